@@ -14,3 +14,4 @@ FAILED_TO_GET_CURRENT_USER_ROLES = 24010
 DISCOURSE_POST_CATEGORY_UUID: str = (
     "00000000-0000-0000-0000-111111111111"  # UUID used to set a fixed category for all posts
 )
+POSTS_STREAM_BATCH_SIZE: int = 500  # Number of rows fetched at once when streaming the posts from the database
@@ -1,17 +1,20 @@
 """Manage the API entrypoints"""
 
+import asyncio
+from functools import cache
 import uuid
 from uuid import UUID
 
 from aiohttp import ClientConnectorError
 from msfwk import database
 from msfwk.context import current_user
-from msfwk.request import HttpClient
 from msfwk.utils.logging import get_logger
+from sqlalchemy import Table
 from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from post.constants import DISCOURSE_POST_CATEGORY_UUID
+from post.http_client import get_session
 
 from .interfaces import (
     BasicPost,
@@ -30,6 +33,34 @@ from .models.exceptions import (
 
 logger = get_logger("application")
 
+# The posts category only has to be created once, remember it exists instead of asking discourse on every creation.
+# Its topics change with every post and reply, so they are not kept.
+_category_lock = asyncio.Lock()
+_category_ensured = False
+
+
+@cache
+def get_posts_table() -> Table:
+    """Posts table of the collaborative schema, resolved once"""
+    return database.get_schema("collaborative").tables["Posts"]
+
+
+@cache
+def get_categories_table() -> Table:
+    """Categories table of the collaborative schema, resolved once"""
+    return database.get_schema("collaborative").tables["Categories"]
+
+
+@cache
+def get_discourses_table() -> Table:
+    """Discourses table of the collaborative schema, resolved once"""
+    return database.get_schema("collaborative").tables["Discourses"]
+
+
+async def use_autocommit(db_session: AsyncSession) -> None:
+    """Run the queries of a read-only session without a BEGIN/COMMIT around them"""
+    await db_session.connection(execution_options={"isolation_level": "AUTOCOMMIT"})
+
 
 async def create_post_in_database(
     post_creation_data: PostCreationData, post_id: str, topic_id: str, db_session: AsyncSession
@@ -40,16 +71,15 @@ async def create_post_in_database(
         user = current_user.get()
         if user is None:
             raise ValueError("Current user not defined !")
-        post_database_updated: PostDatabaseClass = PostDatabaseClass(
-            id=uuid.UUID(post_id),
-            title=post_creation_data.title,
-            despUserId=user.id,
-            topicId=topic_id,
-            categoryId=post_creation_data.category_id,
-            message=post_creation_data.message,
-        )
-        statement = database.get_schema("collaborative").tables["Posts"].insert().values(**dict(post_database_updated))
-        await db_session.execute(statement)
+        values = {
+            "id": uuid.UUID(post_id),
+            "title": post_creation_data.title,
+            "despUserId": user.id,
+            "topicId": int(topic_id),
+            "categoryId": int(post_creation_data.category_id),
+            "message": post_creation_data.message,
+        }
+        await db_session.execute(get_posts_table().insert().values(**values))
         # Do not commit here! Transaction is managed by the caller.
     except IntegrityError as ie:
         message = "Failed to create post because the name is not unique"
@@ -59,7 +89,7 @@ async def create_post_in_database(
         message = "Failed to create post in database"
         logger.exception(message)
         raise PostCreationError(message) from sae
-    return post_database_updated
+    return PostDatabaseClass.model_construct(**values)
 
 
 async def get_posts_list_from_rows(rows: list) -> list[BasicPost]:
@@ -100,11 +130,10 @@ async def delete_storage(resource_id: UUID) -> None:
     Raises:
         RepositoryDeletionError: If the repository cannot be deleted.
     """
-    http_client = HttpClient()
     try:
         # Make a DELETE request to the storage service
         async with (
-            http_client.get_service_session("storage") as session,
+            get_session("storage") as session,
             session.delete(f"/repository/{resource_id}") as response,
         ):
             if response.status not in (200, 204):  # Assuming 200 or 204 indicate success
@@ -119,34 +148,60 @@ async def delete_storage(resource_id: UUID) -> None:
         raise RepositoryDeletionError(message) from cce
 
 
-async def create_discussion(post_id: UUID, post_data: PostCreationData) -> int:
-    """Create a discussion for a post
+async def ensure_discourse_category() -> None:
+    """Make sure the discourse category shared by all the posts exists, only asked once per process"""
+    if _category_ensured:
+        return
+    async with _category_lock:
+        if not _category_ensured:
+            await get_posts_discourse_category()
+
+
+async def get_posts_discourse_category() -> DiscussionResponse:
+    """Return the discourse category shared by all the posts with its current topics
+
+    Returns:
+        DiscussionResponse: the category of the posts
+
+    Raises:
+        DiscussionCommunicationError: If the discussion service could not be reached
+    """
+    global _category_ensured  # noqa: PLW0603
+    category = await get_or_create_discourse_category(uuid.UUID(DISCOURSE_POST_CATEGORY_UUID))
+    _category_ensured = True
+    return category
+
+
+async def create_discussion_topic(post_id: UUID, post_data: PostCreationData) -> int:
+    """Create the discussion topic of a post, the posts category must exist
 
     Args:
         post_id (UUID): Post uuid
-        post_name (str): name of the post
+        post_data (PostCreationData): data of the post
 
     Returns:
         int: discourse id
     """
+    global _category_ensured  # noqa: PLW0603
     logger.debug("creating discussion for post %s", post_id)
-    await get_or_create_discourse_category(uuid.UUID(DISCOURSE_POST_CATEGORY_UUID))
-    return await _create_post_topic(
-        payload={"title": post_data.title, "text": post_data.message, "asset_id": DISCOURSE_POST_CATEGORY_UUID}
-    )
+    try:
+        return await _create_post_topic(
+            payload={"title": post_data.title, "text": post_data.message, "asset_id": DISCOURSE_POST_CATEGORY_UUID}
+        )
+    except (DiscussionCommunicationError, TopicCreationError):
+        # The category may have been removed from discourse, check it again on the next creation
+        _category_ensured = False
+        raise
 
 
 async def get_or_create_discourse_category(category_id: UUID) -> DiscussionResponse:
     """
     Call the discussion module, creating a category if it does not exist yet
     """
-    http_client = HttpClient()
     try:
         async with (
-            http_client.get_service_session("discussion") as session,
-            session.get(
-                f"/discussion/{category_id}",
-            ) as response,
+            get_session("discussion") as session,
+            session.get(f"/discussion/{category_id}") as response,
         ):
             if response.status not in (200, 201):
                 message = f"Discussion service answered {response.status}"
@@ -156,7 +211,7 @@ async def get_or_create_discourse_category(category_id: UUID) -> DiscussionRespo
 
             logger.info("Discussion Created")
             response_content = await response.json()
-            logger.info("Reponse from the discussion module: %s", response_content)
+            logger.debug("Reponse from the discussion module: %s", response_content)
             return DiscussionResponse(**response_content["data"])
     except ClientConnectorError as cce:
         message = "Failed to create discourse due to service unavailability"
@@ -168,13 +223,10 @@ async def get_topic_info_from_discourse(topic_id: int) -> TopicResponse:
     """
     Call the discussion module, creating a category if it does not exist yet
     """
-    http_client = HttpClient()
     try:
         async with (
-            http_client.get_service_session("discussion") as session,
-            session.get(
-                f"/topic/{topic_id}",
-            ) as response,
+            get_session("discussion") as session,
+            session.get(f"/topic/{topic_id}") as response,
         ):
             if response.status not in (200, 201):
                 message = f"Discussion service answered {response.status}"
@@ -183,7 +235,7 @@ async def get_topic_info_from_discourse(topic_id: int) -> TopicResponse:
                 raise DiscussionCommunicationError(error)
 
             response_content = await response.json()
-            logger.info("Reponse from the discussion module: %s", response_content)
+            logger.debug("Reponse from the discussion module: %s", response_content)
             return TopicResponse(**response_content["data"])
     except ClientConnectorError as cce:
         message = "Failed to call discussion-service due to service unavailability"
@@ -192,15 +244,11 @@ async def get_topic_info_from_discourse(topic_id: int) -> TopicResponse:
 
 
 async def _create_post_topic(payload: dict) -> int:
-    http_client = HttpClient()
     # Call the search service to register the repository into gitlab
     try:
         async with (
-            http_client.get_service_session("discussion") as session,
-            session.post(
-                "/topic",
-                json=payload,
-            ) as response,
+            get_session("discussion") as session,
+            session.post("/topic", json=payload) as response,
         ):
             if response.status not in (200, 201):
                 message = f"Topic service answered {response.status}"
@@ -210,7 +258,7 @@ async def _create_post_topic(payload: dict) -> int:
 
             logger.info("Topic Created")
             response_content = await response.json()
-            logger.info("Reponse from the topic: %s", response_content)
+            logger.debug("Reponse from the topic: %s", response_content)
             return response_content["data"]["topic_id"]
     except ClientConnectorError as cce:
         message = "Failed to create topic due to service unavailability"
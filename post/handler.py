@@ -1,25 +1,32 @@
 """Manage the API entrypoints"""
 
 import uuid  # noqa: D100
+from collections.abc import AsyncIterator
+from functools import cache
 from typing import TYPE_CHECKING, NoReturn
 from uuid import UUID
 
 from msfwk import database
-from msfwk.request import HttpClient
 from msfwk.utils.logging import get_logger
-from sqlalchemy import func, select
+from sqlalchemy import Select, bindparam, func, select
 from sqlalchemy.exc import SQLAlchemyError
 
 if TYPE_CHECKING:
     from sqlalchemy.ext.asyncio import AsyncSession
 
-from post.constants import DISCOURSE_POST_CATEGORY_UUID
+from post.constants import POSTS_STREAM_BATCH_SIZE
 from post.db_utils import (
-    create_discussion,
+    create_discussion_topic,
     create_post_in_database,
-    get_or_create_discourse_category,
+    ensure_discourse_category,
+    get_categories_table,
+    get_discourses_table,
+    get_posts_discourse_category,
+    get_posts_table,
     get_topic_info_from_discourse,
+    use_autocommit,
 )
+from post.http_client import get_session
 
 from .interfaces import (
     BasicPost,
@@ -58,7 +65,8 @@ async def create_post(post_creation_data: PostCreationData) -> PostDatabaseClass
             db_session.begin()
         ):
             post_id = uuid.uuid4()
-            topic_id = await create_discussion(post_id, post_creation_data)
+            await ensure_discourse_category()
+            topic_id = await create_discussion_topic(post_id, post_creation_data)
             logger.debug("topic_id: %s", topic_id)
             post = await create_post_in_database(post_creation_data, str(post_id), str(topic_id), db_session)
 
@@ -81,19 +89,33 @@ async def create_post(post_creation_data: PostCreationData) -> PostDatabaseClass
     return post
 
 
-async def complete_post_list_from_discourse(post_list: list[BasicPost]) -> None:
-    """Complete post list with additional information from discourse.
+async def complete_post_stream_from_discourse(posts: AsyncIterator[BasicPost]) -> AsyncIterator[BasicPost]:
+    """Complete streamed posts with additional information from discourse.
 
     Args:
-        post_list: List of posts to complete with discourse information
+        posts: Posts to complete with discourse information
+
+    Yields:
+        BasicPost: the completed posts
     """
     logger.debug("Fetching additional info from discourse...")
-    discourse_info = await get_or_create_discourse_category(uuid.UUID(DISCOURSE_POST_CATEGORY_UUID))
-    logger.debug("Crossing data from database with discourse...")
-    for post in post_list:
-        for topic in discourse_info.topics:
-            if post.topicId == topic["id"]:
-                post.reply_count = topic["posts_count"] - 1  # to account for the first post being the OP
+    topic_by_id = await _get_posts_topics()
+    async for post in posts:
+        _set_reply_count(post, topic_by_id)
+        yield post
+
+
+async def _get_posts_topics() -> dict[int, dict]:
+    """Return the topics of the posts category indexed by their id"""
+    discourse_info = await get_posts_discourse_category()
+    return {topic["id"]: topic for topic in discourse_info.topics}
+
+
+def _set_reply_count(post: BasicPost, topic_by_id: dict[int, dict]) -> None:
+    """Set the reply count of a post from the topics of the posts category"""
+    topic = topic_by_id.get(post.topicId)
+    if topic is not None:
+        post.reply_count = topic["posts_count"] - 1  # to account for the first post being the OP
 
 
 async def complete_single_post_from_discourse(post: BasicPost) -> None:
@@ -105,39 +127,61 @@ async def complete_single_post_from_discourse(post: BasicPost) -> None:
     logger.debug("Fetching additional info from discourse...")
     topic_info = await get_topic_info_from_discourse(post.topicId)
     logger.debug("Crossing data from database with discourse...")
-    post.replies = topic_info.posts
-    del post.replies[0]
+    post.replies = topic_info.posts[1:]  # the first post of the topic is the OP
     post.reply_count = len(post.replies)
 
 
-async def get_posts_from_database(categories: list[int] | None = None) -> list[BasicPost]:
-    """Retrieves a list of posts from the database, including participant information
+@cache
+def _select_posts_statement(*, filter_categories: bool) -> Select:
+    """Query of the posts with their category name, built once and executed with the categories parameter"""
+    posts_table = get_posts_table()
+    categories_table = get_categories_table()
+    statement = select(
+        posts_table,
+        categories_table.c.name.label("category_name"),
+    ).outerjoin(categories_table, categories_table.c.id == posts_table.c.categoryId)
+    if filter_categories:
+        statement = statement.where(posts_table.c.categoryId.in_(bindparam("categories", expanding=True)))
+    return statement.execution_options(yield_per=POSTS_STREAM_BATCH_SIZE)
+
+
+@cache
+def _select_post_statement() -> Select:
+    """Query of a single post with its category name, built once and executed with the post_id parameter"""
+    # The post is read through the default schema, like the session get_post opens
+    tables = database.get_schema().tables
+    post_table = tables["Posts"]
+    category_table = tables["Categories"]
+    return (
+        select(post_table, category_table.c.name.label("category_name"))
+        .join(category_table, post_table.c.categoryId == category_table.c.id)
+        .filter(post_table.c.id == bindparam("post_id"))
+    )
+
+
+@cache
+def _count_user_posts_statement() -> Select:
+    """Count of the posts of a user, built once and executed with the user_id parameter"""
+    posts_table = get_posts_table()
+    return select(func.count()).select_from(posts_table).where(posts_table.c.despUserId == bindparam("user_id"))
+
+
+async def get_posts_from_database(categories: list[int] | None = None) -> AsyncIterator[BasicPost]:
+    """Streams the posts from the database, including participant information
     if the current user is the owner of the post.
 
-    Returns
-        list[BasicPost]: A list of BasicPost objects representing posts with their participants.
+    Yields
+        BasicPost: BasicPost objects representing posts with their participants.
     """
     db_session: AsyncSession
     try:
-        # Access tables from the "collaborative" schema
-        posts_table = database.get_schema("collaborative").tables["Posts"]
-        categories_table = database.get_schema("collaborative").tables["Categories"]
-
         async with database.get_schema("collaborative").get_async_session() as db_session:
             logger.debug("Retrieving posts with participants from database")
-
-            statement = select(
-                posts_table,
-                categories_table.c.name.label("category_name"),
-            ).outerjoin(categories_table, categories_table.c.id == posts_table.c.categoryId)
-
-            if categories is not None:
-                statement = statement.where(posts_table.c.categoryId.in_(categories))
-
-            posts_result = await db_session.execute(statement)
-            rows = posts_result if isinstance(posts_result, list) else posts_result.all()
-
-            return [BasicPost.from_record(row) for row in rows]
+            posts_result = await db_session.stream(
+                _select_posts_statement(filter_categories=categories is not None), {"categories": categories}
+            )
+            async for row in posts_result:
+                yield BasicPost.from_record(row)
 
     except SQLAlchemyError as sae:
         message = "Failed to retrieve posts from database"
@@ -160,17 +204,9 @@ async def get_post(post_id: UUID) -> BasicPost:
     """
     try:
         async with database.get_schema().get_async_session() as db_session:
-            post_table = database.get_schema().tables["Posts"]
-            category_table = database.get_schema().tables["Categories"]
-
             # Query the database for the post
-            query = (
-                select(post_table, category_table.c.name.label("category_name"))
-                .join(category_table, post_table.c.categoryId == category_table.c.id)
-                .filter(post_table.c.id == post_id)
-            )
-
-            result = await db_session.execute(query)
+            await use_autocommit(db_session)
+            result = await db_session.execute(_select_post_statement(), {"post_id": post_id})
             post_data = result.fetchone()
 
             if not post_data:
@@ -198,19 +234,23 @@ async def delete_post_from_db_and_discourse(post_id: UUID) -> None:
     try:
         async with database.get_schema("collaborative").get_async_session() as db_session:
             # Access the required tables
-            posts_table = database.get_schema("collaborative").tables["Posts"]
-            discourses_table = database.get_schema("collaborative").tables["Discourses"]
-
-            # Delete the post itself
-            delete_post_stmt = posts_table.delete().where(posts_table.c.id == post_id)
-            result = await db_session.execute(delete_post_stmt)
+            posts_table = get_posts_table()
+            discourses_table = get_discourses_table()
 
-            # Delete discourse associated with the asset
-            delete_discourse_stmt = discourses_table.delete().where(discourses_table.c.assetId == post_id)
-            await db_session.execute(delete_discourse_stmt)
+            # Delete the post and the discourse associated with it in a single statement
+            deleted_post = (
+                posts_table.delete().where(posts_table.c.id == post_id).returning(posts_table.c.id).cte("deleted_post")
+            )
+            deleted_discourses = (
+                discourses_table.delete()
+                .where(discourses_table.c.assetId.in_(select(deleted_post.c.id)))
+                .cte("deleted_discourses")
+            )
+            statement = select(func.count()).select_from(deleted_post).add_cte(deleted_discourses)
+            result = await db_session.execute(statement)
 
             # Check if the post deletion succeeded
-            if result.rowcount == 0:
+            if not result.scalar():
                 msg = f"Post {post_id} not found or already deleted."
                 raise PostDeletionError(msg)
 
@@ -241,9 +281,8 @@ async def get_current_user_roles() -> list[str]:
     unauthorized_msg = "User is not logged in"
 
     try:
-        http_client = HttpClient()
         async with (
-            http_client.get_service_session("auth") as session,
+            get_session("auth") as session,
             session.get(url) as response,
         ):
             if response.status == HTTP_STATUS_UNAUTHORIZED:
@@ -271,11 +310,9 @@ async def get_user_post_count(user_id: str) -> int:
     """
     try:
         async with database.get_schema("collaborative").get_async_session() as db_session:
-            posts_table = database.get_schema("collaborative").tables["Posts"]
-
             # Count posts for the given user
-            statement = select(func.count()).select_from(posts_table).where(posts_table.c.despUserId == user_id)
-            result = await db_session.execute(statement)
+            await use_autocommit(db_session)
+            result = await db_session.execute(_count_user_posts_statement(), {"user_id": user_id})
             count = result.scalar()
 
             return count if count is not None else 0
@@ -0,0 +1,69 @@
+"""Sessions used to call the other microservices, sharing the connection pool of the process"""
+
+import asyncio
+import json
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
+from aiohttp import ClientSession, ClientTimeout, TCPConnector
+from msfwk.context import current_config, current_token, current_transaction
+from msfwk.request import CONFIG_HEADER_KEY, COOKIE_ACCESS_TOKEN_KEY, TRANSACTION_ID_HEADER_KEY
+from msfwk.utils.logging import get_logger
+
+logger = get_logger("application")
+
+SESSION_TIMEOUT = ClientTimeout(total=300, sock_connect=30)
+
+_connector: TCPConnector | None = None
+_connector_loop: asyncio.AbstractEventLoop | None = None
+
+
+def _get_connector() -> TCPConnector:
+    """Return the connection pool of the process, built on first use for the running loop"""
+    global _connector, _connector_loop  # noqa: PLW0603
+    loop = asyncio.get_running_loop()
+    if _connector is None or _connector.closed or _connector_loop is not loop:
+        logger.debug("Creating the shared connection pool")
+        _connector = TCPConnector(limit=100, limit_per_host=20, keepalive_timeout=75, enable_cleanup_closed=True)
+        _connector_loop = loop
+    return _connector
+
+
+@asynccontextmanager
+async def get_session(service_name: str) -> AsyncIterator[ClientSession]:
+    """Returns a session to call a given service name
+
+    The session is prepared like msfwk's HttpClient.get_service_session (transaction id, configuration and
+    access token of the current request) but its connections come from the pool of the process, so they are
+    kept alive between requests instead of paying a new handshake on every call.
+
+    Args:
+        service_name (str): the name of the service to reach
+    """
+    config = current_config.get()
+    base_url = config.get("services", {}).get(service_name, {}).get("host", f"http://{service_name}-service:5000")
+    headers = {
+        "Content-Type": "application/json",
+        TRANSACTION_ID_HEADER_KEY: current_transaction.get(),
+        CONFIG_HEADER_KEY: json.dumps(config),
+    }
+    token = current_token.get()
+    cookies = {COOKIE_ACCESS_TOKEN_KEY: token} if token else None
+    async with ClientSession(
+        base_url=base_url,
+        headers=headers,
+        cookies=cookies,
+        timeout=SESSION_TIMEOUT,
+        connector=_get_connector(),
+        connector_owner=False,
+    ) as session:
+        yield session
+
+
+async def close_connector() -> None:
+    """Close the shared connection pool, called when the application stops"""
+    global _connector  # noqa: PLW0603
+    if _connector is not None:
+        logger.debug("Closing the shared connection pool")
+        connector, _connector = _connector, None
+        await connector.close()
@@ -1,10 +1,24 @@
 """Models of interface"""
 
 import datetime
+from typing import Annotated
 from uuid import UUID
 
 from msfwk.models import BaseModelAdjusted
-from pydantic import BaseModel
+from pydantic import BaseModel, BeforeValidator, Field
+
+###############
+#    Query
+###############
+
+
+def _split_comma_separated(values: list[str]) -> list[str]:
+    """Split the comma separated values of a repeated query parameter"""
+    return [item for value in values for item in value.split(",")]
+
+
+# Optional ids given as ?ids=1,2 and/or ?ids=1&ids=2
+CommaSeparatedIds = Annotated[list[int] | None, BeforeValidator(_split_comma_separated)]
 
 ###############
 #    Post
@@ -27,8 +41,8 @@ class BasicPost(BaseModel):
 
     @staticmethod
     def from_record(record: any) -> "BasicPost":
-        """Return Post from a business object"""
-        return BasicPost(
+        """Return Post from a business object, the record comes from the database so it is not validated again"""
+        return BasicPost.model_construct(
             id=record.id,
             title=record.title,
             despUserId=record.despUserId,
@@ -41,25 +55,16 @@ class BasicPost(BaseModel):
 
     def to_json(self) -> dict:
         """Dict to be inserted in database"""
-        json = {
-            "id": str(self.id),
-            "title": self.title,
-            "despUserId": self.despUserId,
-            "message": self.message,
-            "categoryId": self.categoryId,
-            "topicId": self.topicId,
-            "categoryName": self.categoryName,
-            "created_at": self.created_at,
-            "reply_count": self.reply_count,
-            "replies": self.replies,
-        }
-        return {k: v for k, v in json.items() if v is not None}
+        # created_at stays a datetime so the response serializer keeps writing UTC offsets as +00:00
+        json = self.model_dump(exclude_none=True)
+        json["id"] = str(self.id)
+        return json
 
 
 class PostCreationData(BaseModelAdjusted):
     """Payload for creating a new post"""
 
-    title: str
+    title: Annotated[str, Field(min_length=1, max_length=64)]
     category_id: str
     message: str
 
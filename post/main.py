@@ -1,10 +1,14 @@
 """Manage the API entrypoints"""
 
+import asyncio
+from collections.abc import AsyncIterator
+from typing import Annotated
 from uuid import UUID
 
+from fastapi import Query
 from msfwk.application import app, openapi_extra
-from msfwk.context import current_user
-from msfwk.models import BaseDespResponse, DespResponse
+from msfwk.context import current_user, register_destroy
+from msfwk.models import BaseDespResponse
 from msfwk.utils.logging import get_logger
 
 from .constants import (
@@ -14,7 +18,7 @@ from .constants import (
     FAILED_TO_GET_POST,
 )
 from .handler import (
-    complete_post_list_from_discourse,
+    complete_post_stream_from_discourse,
     complete_single_post_from_discourse,
     create_post,
     delete_post_from_db_and_discourse,
@@ -23,7 +27,8 @@ from .handler import (
     get_posts_from_database,
     get_user_post_count,
 )
-from .interfaces import BasicPost, PostCreationData, PostsResponse
+from .http_client import close_connector
+from .interfaces import BasicPost, CommaSeparatedIds, PostCreationData, PostsResponse
 from .models.exceptions import (
     PostCountError,
     PostCreationError,
@@ -32,9 +37,13 @@ from .models.exceptions import (
     PostRetrievalError,
     TopicCreationError,
 )
+from .responses import DespResponse, StreamingDespListResponse
 
 logger = get_logger("application")
 
+# Release the shared connection pool when the application stops
+register_destroy(close_connector)
+
 ###############
 #     VM
 ###############
@@ -62,10 +71,6 @@ async def create_post_api(
     response = {}
     try:
         logger.info("Creating post %s ...", post_creation_data.title)
-        if len(post_creation_data.title) == 0 or len(post_creation_data.title) > 64:
-            msg = "Failed to create post: Post name is too long (64 characters max)"
-            logger.error(msg)
-            return DespResponse(data={}, error=msg, code=(FAILED_TO_CREATE_POST), http_status=400)
         post = await create_post(post_creation_data)
         response = post.model_dump()
         logger.debug("Post created")
@@ -84,7 +89,9 @@ async def create_post_api(
     response_description="The list of posts",
     openapi_extra=openapi_extra(secured=False, roles=["user"]),
 )
-async def posts_retrieval(categories: str | None = None) -> DespResponse[list[BasicPost]]:
+async def posts_retrieval(
+    categories: Annotated[CommaSeparatedIds, Query()] = None,
+) -> DespResponse[list[BasicPost]]:
     """Retrieves all posts with their participants.
 
     This endpoint fetches a list of posts from the database, including their associated participants.
@@ -98,15 +105,23 @@ async def posts_retrieval(categories: str | None = None) -> DespResponse[list[Ba
     """
     logger.debug("Handling post retrieval")
 
+    posts = complete_post_stream_from_discourse(get_posts_from_database(categories))
     try:
-        post_list = await get_posts_from_database(
-            None if categories is None else [int(item) for item in categories.split(",")]
-        )
-        await complete_post_list_from_discourse(post_list)
-        return DespResponse(data=[p.to_json() for p in post_list])
+        # Fetch the first post before answering so a database failure is still reported as an error response
+        first_post = await anext(posts, None)
     except PostRetrievalError as gre:
         logger.exception("failed to get post", exc_info=gre)
         return DespResponse(data={}, error="post retrieval failed", code=FAILED_TO_GET_POST)
+    if first_post is None:
+        return DespResponse(data=[])
+    return StreamingDespListResponse(_posts_to_json(first_post, posts))
+
+
+async def _posts_to_json(first_post: BasicPost, posts: AsyncIterator[BasicPost]) -> AsyncIterator[dict]:
+    """Serialize the streamed posts, the first one having already been fetched"""
+    yield first_post.to_json()
+    async for post in posts:
+        yield post.to_json()
 
 
 @app.get(
@@ -152,12 +167,16 @@ async def delete_post(post_id: UUID) -> DespResponse:
         DespResponse: Response indicating success or failure.
     """
     try:
-        # Fetch the post data
-        post_data = await get_post(post_id)
+        # Fetch the post data and the roles of the current user, they do not depend on each other.
+        # Both calls are awaited to the end so a failing one does not leave the other running unattended.
+        results = await asyncio.gather(get_post(post_id), get_current_user_roles(), return_exceptions=True)
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+        post_data, current_user_roles = results
 
         # Check if the current user is the owner or admin of the post
-        current_user_roles = await get_current_user_roles()
-        is_admin = "admin" in [role.lower() for role in current_user_roles]
+        is_admin = any(role.lower() == "admin" for role in current_user_roles)
         logger.debug("is_admin: %s", is_admin)
 
         if post_data.despUserId != current_user.get().id and not is_admin:
@@ -6,54 +6,84 @@ from msfwk.schema.exceptions import SchemaError
 class PostCreationError(Exception):
     """Raised when something wrong happens during the creation of the post"""
 
+    __slots__ = ()
+
 
 class PostCreationDatabaseError(Exception):
     """Raised when enable to insert in database during the creation of the post"""
 
+    __slots__ = ()
+
 
 class RepositoryRegisterError(SchemaError):
     """Raised when something wrong happens during the register of a repository"""
 
+    __slots__ = ()
+
 
 class PostRetrievalError(Exception):
     """Raised when something wrong happens during the retrieval of the post"""
 
+    __slots__ = ()
+
 
 class PostJoinError(Exception):
     """Raised when something wrong happens during the retrieval of the post"""
 
+    __slots__ = ()
+
 
 class PostPermissionError(Exception):
     """Raised when something wrong happens during the retrieval of the post"""
 
+    __slots__ = ()
+
 
 class PostDeletionError(Exception):
     """Raised when something wrong happens during the deletion of the post"""
 
+    __slots__ = ()
+
 
 class RepositoryDeletionError(Exception):
     """Exception raised when repository deletion fails"""
 
+    __slots__ = ()
+
 
 class RepositoryCreationError(Exception):
     """Exception raised when repository creation fails"""
 
+    __slots__ = ()
+
 
 class DiscussionCommunicationError(Exception):
     """Exception raised when discourse creation fails"""
 
+    __slots__ = ()
+
 
 class TopicCreationError(Exception):
     """Exception raised when topic creation fails"""
 
+    __slots__ = ()
+
 class UnauthorizedError(Exception):
     """Exception raised when user is not authorized"""
 
+    __slots__ = ()
+
 class UserNotLoggedInError(Exception):
     """Exception raised when user is not logged in"""
 
+    __slots__ = ()
+
 class FailedToGetCurrentUserRolesError(Exception):
     """Exception raised when failed to get current user roles"""
 
+    __slots__ = ()
+
 class PostCountError(Exception):
     """Exception raised when failed to get post count"""
+
+    __slots__ = ()
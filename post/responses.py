@@ -0,0 +1,34 @@
+"""Responses returned by the API entrypoints"""
+
+from collections.abc import AsyncIterator
+from typing import Generic, TypeVar
+
+import orjson
+from fastapi.responses import StreamingResponse
+from msfwk.models import DespResponse as MsfwkDespResponse
+
+T = TypeVar("T")
+
+
+class DespResponse(MsfwkDespResponse[T], Generic[T]):
+    """DespResponse serialized with orjson, which natively handles the UUID and datetime of the posts"""
+
+    def render(self, content: T) -> bytes:
+        """Serialize the content of the response"""
+        return orjson.dumps(content, default=self.custom_serializer, option=orjson.OPT_NON_STR_KEYS)
+
+
+class StreamingDespListResponse(StreamingResponse):
+    """DespResponse with a list as data, the items are serialized and sent one at a time"""
+
+    def __init__(self, items: AsyncIterator[dict]) -> None:
+        super().__init__(self._render_items(items), media_type="application/json")
+
+    @staticmethod
+    async def _render_items(items: AsyncIterator[dict]) -> AsyncIterator[bytes]:
+        yield b'{"data":['
+        separator = b""
+        async for item in items:
+            yield separator + orjson.dumps(item, option=orjson.OPT_NON_STR_KEYS)
+            separator = b","
+        yield b"]}"
@@ -1,59 +1,62 @@
-from unittest.mock import AsyncMock, MagicMock, Mock
-import aiohttp
+from unittest.mock import Mock
 from fastapi.testclient import TestClient
 
 from msfwk.models import DespUser
 from msfwk.utils.user import set_current_user
-from .utils import is_valid_uuid,mock_database_class,fake_table
+from .utils import AsyncCtx,StubResponse,json_response,app,mock_service_session,is_valid_uuid,mock_database_class,mocked_database_schema,fake_table
 from msfwk.utils.conftest import mock_read_config,mock_http_client
 import pytest
 from msfwk.utils.logging import get_logger
 import re
 from .config import test_post_config
+from post import db_utils
+from post.interfaces import PostCreationData
+from post.models.exceptions import TopicCreationError
+import asyncio
+import uuid
 
 logger = get_logger("test")
 
-def mock_microservice_calls(
-        path: str=None,
-        json=None):
-        logger.debug("Request hooked %s %s",path,json)
-        mock = MagicMock(spec=aiohttp.ClientResponse)
-        mock.headers = {'Content-Type':'application/json'}
-        mock.status = 200
-        pattern = r'^/discussion/[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}$'
-
-        if re.match(pattern, path) :
-            logger.debug("Mocked JsonResponse %s",path)
-            mock.json.return_value = {
+_DEFAULT_RESPONSE = json_response()
+_DISCUSSION_RESPONSE = json_response({
                                         "data": {
                                             "id": "1",
                                             "name": "postdiscussion",
                                             "topics": []
                                         }
-                                    }
-        if path == '/repository':
-            logger.debug("Mocked JsonResponse %s",path)
-            mock.json.return_value = {
+                                    })
+_REPOSITORY_RESPONSE = json_response({
                                         "data": {
                                             "resource_id": "b594cb91-0dec-4ab8-8005-cf95f4e55d30",
                                             "url": "http://gitlab.example.com/1234/",
                                             "token": "blablablabla"
                                         }
-                                    }
-        amock = AsyncMock(return_value=mock)
-        amock.__aenter__ = amock
-        return amock
+                                    })
+_RESPONSES = {'/repository': _REPOSITORY_RESPONSE}
+_DISCUSSION_RE = re.compile(r'^/discussion/[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}$')
+
+def mock_microservice_calls(
+        path: str=None,
+        json=None):
+        logger.debug("Request hooked %s %s",path,json)
+
+        if _DISCUSSION_RE.match(path) :
+            logger.debug("Mocked JsonResponse %s",path)
+            return _DISCUSSION_RESPONSE
+        if path in _RESPONSES:
+            logger.debug("Mocked JsonResponse %s",path)
+            return _RESPONSES[path]
+        return _DEFAULT_RESPONSE
 
 @pytest.mark.skip(reason="Mock PostParticipants table")
 # @pytest.mark.component
-def test_create_post(mock_read_config,mock_http_client, mock_database_class):
-    mock_http_client.post = Mock(side_effect=mock_microservice_calls)
+def test_create_post(app,mock_read_config,mock_service_session, mock_database_class):
+    mock_service_session.post = Mock(side_effect=mock_microservice_calls)
     mock_read_config.return_value = test_post_config
     mock_database_class.tables = {
         "Posts": fake_table("Posts", [{"id": "123", "name": "test_post"}]),
         "PostParticipants": fake_table("PostParticipants", []),
     }
-    from post.main import app
     set_current_user(DespUser(f"{9999}", "Yves"))
     # Mock the call to the Search Service
     with TestClient(app) as client:
@@ -67,3 +70,37 @@ def test_create_post(mock_read_config,mock_http_client, mock_database_class):
         data = response.json()["data"]
         assert is_valid_uuid(data['id']), f"id is an invalid UUID"
         #TODO(tchassanit): add more assert if needed
+
+@pytest.mark.component
+@pytest.mark.parametrize("title", ["", "t" * 65])
+def test_create_post_invalid_title(app, mock_read_config, mock_http_client, mock_database_class, title):
+    mock_read_config.return_value = test_post_config
+    with TestClient(app) as client:
+        payload={
+            "title": title,
+            "category_id": "1",
+            "message": "message_test"
+        }
+        response = client.post("/",json=payload)
+        assert response.status_code == 422
+        mock_database_class.get_async_session().execute.assert_not_called()
+
+@pytest.mark.component
+def test_create_topic_checks_a_deleted_category_again(mock_service_session, monkeypatch):
+    """A topic refused by discourse makes the next creation check the posts category again"""
+    monkeypatch.setattr(db_utils, "_category_ensured", False)
+    refused_topic = StubResponse({"error": {"message": "Category not found"}})
+    refused_topic.status = 404
+    mock_service_session.get = Mock(side_effect=mock_microservice_calls)
+    mock_service_session.post = Mock(side_effect=[AsyncCtx(refused_topic), json_response({"data": {"topic_id": 42}})])
+    post_data = PostCreationData(title="title_test", category_id="1", message="message_test")
+
+    async def create_topic():
+        await db_utils.ensure_discourse_category()
+        return await db_utils.create_discussion_topic(uuid.uuid4(), post_data)
+
+    with pytest.raises(TopicCreationError):
+        asyncio.run(create_topic())
+    assert asyncio.run(create_topic()) == 42
+    category_checks = [call for call in mock_service_session.get.call_args_list if _DISCUSSION_RE.match(call.args[0])]
+    assert len(category_checks) == 2
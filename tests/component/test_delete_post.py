@@ -1,42 +1,54 @@
 from fastapi.testclient import TestClient
 from unittest.mock import MagicMock, Mock, AsyncMock, patch
 import pytest
-import aiohttp
-from msfwk.utils.conftest import mock_read_config, mock_http_client
+from msfwk.utils.conftest import mock_http_client
 from msfwk.models import DespUser
 from msfwk.utils.user import set_current_user
-from .utils import mock_database_class, is_valid_uuid, fake_table
-from .config import test_post_config
+from .utils import AsyncCtx, StubResponse, app, mock_service_session, mock_database_class, mocked_database_schema, is_valid_uuid, fake_table
 from types import SimpleNamespace
 from msfwk.utils.logging import get_logger
+from post.models.exceptions import PostRetrievalError
+import asyncio
+import copy
 import datetime
 import uuid
 
 logger = get_logger("test")
 
 # Helper functions to create mocks and test data
+class MockPost(SimpleNamespace):
+    """Post returned by the mocked lookups"""
+
+    def to_json(self):
+        return {
+            "id": self.id,
+            "despUserId": self.despUserId,
+            "title": self.title
+        }
+
+_TEMPLATE_POST = MockPost(
+    id=None,
+    despUserId=None,
+    topicId=123,
+    categoryId=1,
+    title="Test Post Title",
+    message="Test post message",
+    categoryName="Test Category",
+    created_at=datetime.datetime.now(),
+    reply_count=0,
+    replies=[],
+)
+
 def create_mock_post(owner_id="1234", post_id=None):
     """Create a mock post with the given owner ID"""
     if post_id is None:
         post_id = str(uuid.uuid4())
-        
-    return SimpleNamespace(
-        id=post_id,
-        despUserId=owner_id,
-        topicId=123,
-        categoryId=1,
-        title="Test Post Title",
-        message="Test post message",
-        categoryName="Test Category",
-        created_at=datetime.datetime.now(),
-        reply_count=0,
-        replies=[],
-        to_json=lambda: {
-            "id": post_id,
-            "despUserId": owner_id,
-            "title": "Test Post Title"
-        }
-    )
+
+    post = copy.copy(_TEMPLATE_POST)
+    post.id = post_id
+    post.despUserId = owner_id
+    post.replies = []
+    return post
 
 def setup_database_mocks(mock_database_class, post_owner_id="1234"):
     """Set up database mocks for the tests"""
@@ -77,53 +89,54 @@ def setup_database_mocks(mock_database_class, post_owner_id="1234"):
     
     return schema_mock
 
+# Profile payloads returned to the hooked /profile requests
+_ADMIN_ROLES = ["user", "admin"]
+_USER_ROLES = ["user"]
+_ADMIN_PAYLOAD = {"data": {"roles": _ADMIN_ROLES}, "roles": _ADMIN_ROLES}
+_USER_PAYLOAD = {"data": {"roles": _USER_ROLES}, "roles": _USER_ROLES}
+
 # Mock external microservice calls
 def create_microservice_mock(is_admin=False):
     """Create a mock for microservice calls with appropriate roles"""
+    profile_response = AsyncCtx(StubResponse(_ADMIN_PAYLOAD if is_admin else _USER_PAYLOAD))
+    default_response = AsyncCtx(StubResponse())
+
     def mock_microservice_calls(path: str = None, json=None):
         logger.debug("Request hooked %s %s", path, json)
-        mock_response = MagicMock(spec=aiohttp.ClientResponse)
-        mock_response.headers = {'Content-Type': 'application/json'}
-        mock_response.status = 200
-
-        # Make json() an async method
-        async def async_json():
-            if path == '/profile':
-                roles = ["user", "admin"] if is_admin else ["user"]
-                logger.debug(f"Mocked profile response with roles: {roles}")
-                return {
-                    "data": {
-                        "roles": roles
-                    },
-                    "roles": roles
-                }
-            return {}
-
-        mock_response.json = async_json
-
-        async_mock = AsyncMock(return_value=mock_response)
-        async_mock.__aenter__ = async_mock
-        return async_mock
-        
+        return profile_response if path == '/profile' else default_response
+
     return mock_microservice_calls
 
+# The routers are stateless, they are shared by all the tests
+_ADMIN_MICROSERVICE_CALLS = create_microservice_mock(is_admin=True)
+_REGULAR_MICROSERVICE_CALLS = create_microservice_mock(is_admin=False)
+
 # Fixtures for test data
-@pytest.fixture
+@pytest.fixture(scope="module")
+def client(app):
+    """Start the application once for all the tests of the module
+
+    It starts with the test configuration the app fixture patched in, a per-test mock_read_config is not used.
+    """
+    with TestClient(app) as client:
+        yield client
+
+@pytest.fixture(scope="session")
 def test_post_id():
     """Return a fixed test post ID"""
     return "2c81a431-af77-48fc-b7e9-198f4af8f8f4"
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def post_owner():
     """Return a post owner user object"""
     return {"id": "1234", "name": "PostOwner"}
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def admin_user():
     """Return an admin user object"""
     return {"id": "9999", "name": "AdminUser"}
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def regular_user():
     """Return a regular user object (neither owner nor admin)"""
     return {"id": "5555", "name": "RegularUser"}
@@ -139,102 +152,98 @@ def schema_with_owner_post(mock_database_class, post_owner):
     return setup_database_mocks(mock_database_class, post_owner["id"])
 
 @pytest.fixture
-def admin_client(mock_http_client):
+def patched_database(mock_database_class, owner_post, schema_with_owner_post):
+    """Patch the database schemas and the post lookup used by the delete endpoint, yields the lookup mock"""
+    with patch('msfwk.database.get_schema', side_effect=lambda schema_name=None:
+               schema_with_owner_post if schema_name == "collaborative" else mock_database_class), \
+         patch('post.main.get_post', new=AsyncMock(return_value=owner_post)) as get_post:
+        yield get_post
+
+@pytest.fixture
+def admin_client(mock_service_session):
     """Return a client with admin role"""
-    mock_http_client.get = Mock(side_effect=create_microservice_mock(is_admin=True))
-    return mock_http_client
+    mock_service_session.get = Mock(side_effect=_ADMIN_MICROSERVICE_CALLS)
+    return mock_service_session
 
 @pytest.fixture
-def regular_client(mock_http_client):
+def regular_client(mock_service_session):
     """Return a client with regular user role (not admin)"""
-    mock_http_client.get = Mock(side_effect=create_microservice_mock(is_admin=False))
-    return mock_http_client
+    mock_service_session.get = Mock(side_effect=_REGULAR_MICROSERVICE_CALLS)
+    return mock_service_session
 
 @pytest.mark.component
-def test_delete_post_admin(mock_read_config, admin_client, mock_database_class, 
-                          test_post_id, post_owner, admin_user, owner_post, schema_with_owner_post):
+def test_delete_post_admin(client, admin_client, patched_database,
+                          test_post_id, admin_user):
     """Test for the delete_post endpoint as an admin user."""
-    from post.main import app
-
-    # Set up config
-    mock_read_config.return_value = test_post_config
+    # Set current user as admin
+    set_current_user(DespUser(admin_user["id"], admin_user["name"]))
     
-    # Mock the database.get_schema to return our mocked schema
-    with patch('msfwk.database.get_schema', side_effect=lambda schema_name=None: 
-               schema_with_owner_post if schema_name == "collaborative" else mock_database_class):
-
-        # Mock get_post to return our test data
-        with patch('post.handler.get_post', return_value=owner_post):
-            # Set current user as admin
-            set_current_user(DespUser(admin_user["id"], admin_user["name"]))
-            
-            # Test the endpoint
-            with TestClient(app) as client:
-                response = client.delete(f"/{test_post_id}")
-                
-                # Verify response
-                assert response.status_code == 200
-                data = response.json()
-                assert "data" in data
-                assert "message" in data["data"]
-                assert test_post_id in data["data"]["message"]
+    # Test the endpoint
+    response = client.delete(f"/{test_post_id}")
+    
+    # Verify response
+    assert response.status_code == 200
+    data = response.json()
+    assert "data" in data
+    assert "message" in data["data"]
+    assert test_post_id in data["data"]["message"]
+    patched_database.assert_awaited_once_with(uuid.UUID(test_post_id))
 
 @pytest.mark.component
-def test_delete_post_owner(mock_read_config, regular_client, mock_database_class,
-                          test_post_id, post_owner, schema_with_owner_post):
+def test_delete_post_owner(client, regular_client, patched_database,
+                          test_post_id, post_owner):
     """Test for the delete_post endpoint as the post owner."""
-    from post.main import app
-
-    # Set up config
-    mock_read_config.return_value = test_post_config
+    # Set current user as the owner
+    set_current_user(DespUser(post_owner["id"], post_owner["name"]))
     
-    # Create post owned by the current user
-    owner_post = create_mock_post(owner_id=post_owner["id"], post_id=test_post_id)
-
-    # Mock the database.get_schema to return our mocked schema
-    with patch('msfwk.database.get_schema', side_effect=lambda schema_name=None: 
-               schema_with_owner_post if schema_name == "collaborative" else mock_database_class):
-
-        # Mock get_post to return our test data
-        with patch('post.handler.get_post', return_value=owner_post):
-            # Set current user as the owner
-            set_current_user(DespUser(post_owner["id"], post_owner["name"]))
-            
-            # Test the endpoint
-            with TestClient(app) as client:
-                response = client.delete(f"/{test_post_id}")
-                
-                # Verify response
-                assert response.status_code == 200
-                data = response.json()
-                assert "data" in data
-                assert "message" in data["data"]
-                assert test_post_id in data["data"]["message"]
+    # Test the endpoint
+    response = client.delete(f"/{test_post_id}")
+    
+    # Verify response
+    assert response.status_code == 200
+    data = response.json()
+    assert "data" in data
+    assert "message" in data["data"]
+    assert test_post_id in data["data"]["message"]
+    patched_database.assert_awaited_once_with(uuid.UUID(test_post_id))
 
 @pytest.mark.component
-def test_delete_post_unauthorized(mock_read_config, regular_client, mock_database_class,
-                                 test_post_id, post_owner, regular_user, owner_post, schema_with_owner_post):
+def test_delete_post_unauthorized(client, regular_client, patched_database,
+                                 test_post_id, regular_user):
     """Test for the delete_post endpoint with unauthorized user."""
-    from post.main import app
-
-    # Set up config
-    mock_read_config.return_value = test_post_config
-
-    # Mock the database.get_schema to return our mocked schema
-    with patch('msfwk.database.get_schema', side_effect=lambda schema_name=None: 
-               schema_with_owner_post if schema_name == "collaborative" else mock_database_class):
-
-        # Mock get_post to return our test data
-        with patch('post.handler.get_post', return_value=owner_post):
-            # Set current user as a regular user (not owner, not admin)
-            set_current_user(DespUser(regular_user["id"], regular_user["name"]))
-            
-            # Test the endpoint
-            with TestClient(app) as client:
-                response = client.delete(f"/{test_post_id}")
-                
-                # Verify response indicates forbidden
-                assert response.status_code == 403
-                data = response.json()
-                assert "error" in data
-                assert "Only the post owner or admin can delete the post" in data["error"]["message"] 
\ No newline at end of file
+    # Set current user as a regular user (not owner, not admin)
+    set_current_user(DespUser(regular_user["id"], regular_user["name"]))
+    
+    # Test the endpoint
+    response = client.delete(f"/{test_post_id}")
+    
+    # Verify response indicates forbidden
+    assert response.status_code == 403
+    data = response.json()
+    assert "error" in data
+    assert "Only the post owner or admin can delete the post" in data["error"]["message"]
+    patched_database.assert_awaited_once_with(uuid.UUID(test_post_id))
+
+@pytest.mark.component
+def test_delete_post_not_found(client, patched_database,
+                               test_post_id, admin_user):
+    """Test for the delete_post endpoint when the post does not exist."""
+    patched_database.side_effect = PostRetrievalError("Post not found")
+    set_current_user(DespUser(admin_user["id"], admin_user["name"]))
+    roles_lookup = SimpleNamespace(finished=False)
+
+    async def slow_roles():
+        # still running when the post lookup fails
+        await asyncio.sleep(0.05)
+        roles_lookup.finished = True
+        return _ADMIN_ROLES
+
+    with patch('post.main.get_current_user_roles', new=AsyncMock(side_effect=slow_roles)) as get_roles:
+        response = client.delete(f"/{test_post_id}")
+
+    assert response.status_code == 500
+    assert "An unexpected error occurred while deleting the post" in response.json()["error"]["message"]
+    patched_database.assert_awaited_once_with(uuid.UUID(test_post_id))
+    get_roles.assert_awaited_once_with()
+    # The roles were awaited to the end, not left pending after the failed lookup
+    assert roles_lookup.finished
@@ -0,0 +1,95 @@
+import asyncio
+import json
+
+import pytest
+from msfwk.context import current_config, current_token, current_transaction
+from msfwk.request import CONFIG_HEADER_KEY, COOKIE_ACCESS_TOKEN_KEY, TRANSACTION_ID_HEADER_KEY
+from yarl import URL
+
+from post import http_client
+from post.http_client import _get_connector, close_connector, get_session
+
+test_session_config = {"services": {"auth": {"host": "http://auth.test:5000"}}}
+
+
+@pytest.fixture(autouse=True)
+def reset_connector():
+    """Start every test without a shared connection pool"""
+    http_client._connector = None
+    http_client._connector_loop = None
+    yield
+    http_client._connector = None
+    http_client._connector_loop = None
+
+
+async def _open_session(token, transaction):
+    """Open a session for the given user and return what it would send"""
+    current_config.set(test_session_config)
+    current_token.set(token)
+    current_transaction.set(transaction)
+    async with get_session("auth") as session:
+        cookies = session.cookie_jar.filter_cookies(URL("http://auth.test:5000/profile"))
+        return session, {name: morsel.value for name, morsel in cookies.items()}, dict(session.headers)
+
+
+@pytest.mark.component
+def test_get_session_carries_the_current_request():
+    async def scenario():
+        first = await _open_session("token-of-alice", "transaction-1")
+        second = await _open_session("token-of-bob", "transaction-2")
+        anonymous = await _open_session(None, "transaction-3")
+        await close_connector()
+        return first, second, anonymous
+
+    (first_session, first_cookies, first_headers), (_, second_cookies, second_headers), (_, anonymous_cookies, _) = (
+        asyncio.run(scenario())
+    )
+
+    assert first_session._base_url == URL("http://auth.test:5000")
+    assert first_cookies == {COOKIE_ACCESS_TOKEN_KEY: "token-of-alice"}
+    assert first_headers[TRANSACTION_ID_HEADER_KEY] == "transaction-1"
+    assert json.loads(first_headers[CONFIG_HEADER_KEY]) == test_session_config
+    # the sessions share the pool, never the cookies of the previous user
+    assert second_cookies == {COOKIE_ACCESS_TOKEN_KEY: "token-of-bob"}
+    assert second_headers[TRANSACTION_ID_HEADER_KEY] == "transaction-2"
+    assert anonymous_cookies == {}
+
+
+@pytest.mark.component
+def test_get_session_borrows_the_shared_connector():
+    async def scenario():
+        current_config.set(test_session_config)
+        async with get_session("auth") as first, get_session("auth") as second:
+            assert first.connector is second.connector is _get_connector()
+            assert first._connector_owner is False
+            assert second._connector_owner is False
+        connector = _get_connector()
+        assert not connector.closed, "closing a session must not close the shared pool"
+        await close_connector()
+        assert connector.closed
+
+    asyncio.run(scenario())
+
+
+@pytest.mark.component
+def test_get_connector_is_rebuilt_for_a_new_loop():
+    async def current_connector():
+        return _get_connector()
+
+    async def close(connector):
+        await connector.close()
+
+    async def reuse_and_close():
+        connector = _get_connector()
+        assert connector is _get_connector()
+        await connector.close()
+        rebuilt = _get_connector()
+        assert rebuilt is not connector, "a closed pool must be replaced"
+        await close_connector()
+
+    first = asyncio.run(current_connector())
+    second = asyncio.run(current_connector())
+    assert second is not first, "a pool bound to a finished loop must not be reused"
+    asyncio.run(close(first))
+    asyncio.run(close(second))
+    asyncio.run(reuse_and_close())
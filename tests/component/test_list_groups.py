@@ -2,65 +2,43 @@ from fastapi.testclient import TestClient
 from unittest.mock import MagicMock, Mock, AsyncMock, patch
 import logging
 import pytest
-import aiohttp
 from msfwk.utils.conftest import mock_read_config, mock_http_client, mock_user, mock_request
-from .utils import fake_table, mock_database_class, is_valid_uuid
-from sqlalchemy.engine.result import MappingResult
-from msfwk.models import DespUser
-from msfwk.utils.user import set_current_user
-from .config import test_post_config
-
-
-logger = logging.getLogger("test")
-
-from fastapi.testclient import TestClient
-from unittest.mock import MagicMock, Mock, AsyncMock, patch
-import logging
-import pytest
-import aiohttp
-from msfwk.utils.conftest import mock_read_config, mock_http_client, mock_user, mock_request
-from .utils import fake_table, mock_database_class, is_valid_uuid
+from .utils import json_response, app, mock_service_session, fake_table, mock_database_class, mocked_database_schema, is_valid_uuid
 from sqlalchemy.engine.result import MappingResult
 from msfwk.models import DespUser
 from msfwk.utils.user import set_current_user
 from .config import test_post_config
 from types import SimpleNamespace  # For mocking attribute-based access
+from sqlalchemy.exc import SQLAlchemyError
+from post.constants import FAILED_TO_GET_POST
+from post.interfaces import BasicPost
+from post.responses import DespResponse
+import datetime
+import uuid
 
 logger = logging.getLogger("test")
 
+_DEFAULT_RESPONSE = json_response()
+_DISCUSSION_RESPONSE = json_response({
+    "data": {
+        "id": "1",
+        "name": "postdiscussion",
+        "topics": [{"id": 123, "posts_count": 3}],
+    }
+})
+
 # Mock external microservice calls
 def mock_microservice_calls(path: str = None, json=None):
     logger.debug("Request hooked %s %s", path, json)
-    mock_response = MagicMock()
-    mock_response.headers = {'Content-Type': 'application/json'}
-    mock_response.status = 200
-
     if path.startswith("/discussion/"):
         logger.debug("Mocked JsonResponse %s", path)
-        mock_response.json.return_value = {
-            "data": {
-                "id": "1",
-                "name": "postdiscussion",
-                "topics": [],
-            }
-        }
-
-    async_mock = AsyncMock(return_value=mock_response)
-    async_mock.__aenter__ = async_mock
-    return async_mock
-
-@pytest.mark.skip(reason="Have to mock the table Categories")
-# @pytest.mark.component
-def test_list_posts(mock_read_config, mock_http_client, mock_database_class):
-    """Test for the list_posts endpoint."""
-    from post.main import app
-
-    # Mock the configuration and HTTP client
-    mock_http_client.get = Mock(side_effect=mock_microservice_calls)
-    mock_read_config.return_value = test_post_config
+        return _DISCUSSION_RESPONSE
+    return _DEFAULT_RESPONSE
 
-    # Mock database tables
-    posts_data = [
+@pytest.fixture(scope="session")
+def sample_posts_data():
+    """Rows returned by the mocked posts query"""
+    return (
         # Post with participants
         SimpleNamespace(
             id="2c81a431-af77-48fc-b7e9-198f4af8f8f4", 
@@ -87,8 +65,16 @@ def test_list_posts(mock_read_config, mock_http_client, mock_database_class):
             username=None,
             participant_status=None
         )
-    ]
-    
+    )
+
+@pytest.mark.skip(reason="Have to mock the table Categories")
+# @pytest.mark.component
+def test_list_posts(app, mock_read_config, mock_service_session, mock_database_class, sample_posts_data):
+    """Test for the list_posts endpoint."""
+    # Mock the configuration and HTTP client
+    mock_service_session.get = Mock(side_effect=mock_microservice_calls)
+    mock_read_config.return_value = test_post_config
+
     # Mock database calls
     mock_database_class.tables = {
         "Posts": fake_table(
@@ -101,11 +87,10 @@ def test_list_posts(mock_read_config, mock_http_client, mock_database_class):
         ),
     }
 
-    # Mock the execute call to return the prepared rows
-    async def mock_execute(query):
-        return posts_data  # Return the mock data representing the result of the SQL query
-
-    mock_database_class.get_async_session().execute.side_effect = mock_execute
+    # Mock the stream call to return the prepared rows
+    posts_result = MagicMock()
+    posts_result.__aiter__.return_value = sample_posts_data
+    mock_database_class.get_async_session().stream = AsyncMock(return_value=posts_result)
 
     # Set the current user
     set_current_user(DespUser("9999", "Yves"))
@@ -128,3 +113,94 @@ def test_list_posts(mock_read_config, mock_http_client, mock_database_class):
             assert "categoryId" in post
             assert "participants" in post
             assert isinstance(post["participants"], list)
+
+@pytest.mark.component
+def test_list_posts_invalid_categories(app, mock_read_config, mock_http_client, mock_database_class):
+    """Test that the list_posts endpoint rejects categories that are not ids."""
+    mock_read_config.return_value = test_post_config
+
+    with TestClient(app) as client:
+        response = client.get("/", params={"categories": "1,abc"})
+        assert response.status_code == 422
+        mock_database_class.get_async_session().stream.assert_not_called()
+
+@pytest.fixture(scope="session")
+def streamed_posts_rows():
+    """Rows streamed by the mocked posts query, the first post has a discussion topic with 2 replies"""
+    created_at = datetime.datetime(2024, 1, 2, 3, 4, 5, tzinfo=datetime.timezone.utc)
+    return (
+        SimpleNamespace(
+            id=uuid.UUID("2c81a431-af77-48fc-b7e9-198f4af8f8f4"),
+            title="first post",
+            message="We use this post for test",
+            despUserId="9999",
+            topicId=123,
+            categoryId=1,
+            category_name="General",
+            created_at=created_at,
+        ),
+        SimpleNamespace(
+            id=uuid.UUID("bfc7fe75-74c7-42b6-aa93-c0cfd4f8f44b"),
+            title="second post",
+            message="This post has no discussion topic yet",
+            despUserId="no-robot",
+            topicId=456,
+            categoryId=1,
+            category_name="General",
+            created_at=created_at,
+        ),
+    )
+
+@pytest.fixture
+def posts_stream(mock_read_config, mock_service_session, mock_database_class):
+    """Return the mocked stream method of the database session, the posts category comes from the discussion router"""
+    mock_read_config.return_value = test_post_config
+    mock_service_session.get = Mock(side_effect=mock_microservice_calls)
+    mock_database_class.tables = {
+        "Posts": fake_table("Posts", ["id", "title", "message", "despUserId", "topicId", "categoryId", "created_at"]),
+        "Categories": fake_table("Categories", ["id", "name"]),
+    }
+    return mock_database_class.get_async_session().stream
+
+def _stream_result(rows) -> MagicMock:
+    """Result of a streamed query iterating over the given rows"""
+    result = MagicMock()
+    result.__aiter__.return_value = rows
+    return result
+
+@pytest.mark.component
+def test_list_posts_streamed(app, posts_stream, streamed_posts_rows):
+    """Test that the streamed list has the body of a regular DespResponse."""
+    posts_stream.return_value = _stream_result(streamed_posts_rows)
+
+    with TestClient(app) as client:
+        response = client.get("/")
+
+    assert response.status_code == 200
+    expected_posts = [BasicPost.from_record(row) for row in streamed_posts_rows]
+    expected_posts[0].reply_count = 2
+    assert response.content == DespResponse(data=[post.to_json() for post in expected_posts]).body
+    assert response.json()["data"][0]["created_at"] == "2024-01-02T03:04:05+00:00"
+
+@pytest.mark.component
+def test_list_posts_empty(app, posts_stream):
+    """Test that the list of posts is empty when there are no posts."""
+    posts_stream.return_value = _stream_result([])
+
+    with TestClient(app) as client:
+        response = client.get("/")
+
+    assert response.status_code == 200
+    assert response.json() == {"data": []}
+
+@pytest.mark.component
+def test_list_posts_retrieval_error(app, posts_stream):
+    """Test that a database failure before the first post is returned as an error response."""
+    posts_stream.side_effect = SQLAlchemyError("connection lost")
+
+    with TestClient(app) as client:
+        response = client.get("/")
+
+    expected = DespResponse(data={}, error="post retrieval failed", code=FAILED_TO_GET_POST)
+    assert response.status_code == expected.status_code
+    assert response.content == expected.body